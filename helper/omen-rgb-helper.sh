@@ -4,26 +4,17 @@
 # Called by pkexec from the GUI.
 # Arguments: $1 - Zone ID (0, 1, 2, 3 or "all")
 #            $2 - Color in hex format (e.g., FFFFFF)
+#
+# Batch mode: $1 - "--batch"
+#   Reads one "<zone_id|all> <RRGGBB_HEX>" pair per line from stdin, so several
+#   zones can be updated with a single pkexec authorization.
 
-ZONE_ID=$1
-COLOR_HEX=$2
 SYSFS_BASE="/sys/devices/platform/hp-wmi/rgb_zones"
 
-# --- Basic Validation ---
-if [[ -z "$ZONE_ID" || -z "$COLOR_HEX" ]]; then
-  echo "Usage: $0 <zone_id|all> <RRGGBB_HEX>" >&2
-  exit 1
-fi
-
-# Check color format (6 hex chars)
-if ! [[ "$COLOR_HEX" =~ ^[0-9A-Fa-f]{6}$ ]]; then
-  echo "Error: Invalid color format. Use RRGGBB hex (e.g., FF0000)." >&2
-  exit 1
-fi
-
 # --- Write Function ---
 write_color() {
   local zone_num=$1
+  local color_hex=$2
   local zone_hex
   printf -v zone_hex "%02X" "$zone_num" # Format zone number as two hex digits
   local sysfs_file="${SYSFS_BASE}/zone${zone_hex}_rgb"
@@ -39,30 +30,66 @@ write_color() {
 
   # Use process substitution to avoid issues with echo -n portability if any
   # Though echo -n is quite standard nowadays
-  # exec > "$sysfs_file" <<< "$COLOR_HEX"
+  # exec > "$sysfs_file" <<< "$color_hex"
   # Or simply:
-  echo -n "$COLOR_HEX" > "$sysfs_file"
+  echo -n "$color_hex" > "$sysfs_file"
 
 
   if [ $? -ne 0 ]; then
     echo "Error: Failed to write to $sysfs_file" >&2
     return 1
   fi
-  # echo "Successfully set zone $zone_hex to $COLOR_HEX" # Optional success log
+  # echo "Successfully set zone $zone_hex to $color_hex" # Optional success log
   return 0
 }
 
 # --- Zone Logic ---
+# Validates one zone/color pair and writes it. Returns 1 on any error.
+apply_zone() {
+  local zone_id=$1
+  local color_hex=$2
+  local rc=0
+
+  # Check color format (6 hex chars)
+  if ! [[ "$color_hex" =~ ^[0-9A-Fa-f]{6}$ ]]; then
+    echo "Error: Invalid color format. Use RRGGBB hex (e.g., FF0000)." >&2
+    return 1
+  fi
+
+  if [[ "$zone_id" == "all" ]]; then
+    for i in {0..3}; do
+      write_color "$i" "$color_hex" || rc=1 # Set rc=1 if any write fails
+    done
+  elif [[ "$zone_id" =~ ^[0-3]$ ]]; then
+    write_color "$zone_id" "$color_hex" || rc=1
+  else
+    echo "Error: Invalid zone ID. Use 0, 1, 2, 3, or 'all'." >&2
+    rc=1
+  fi
+  return $rc
+}
+
 RC=0
-if [[ "$ZONE_ID" == "all" ]]; then
-  for i in {0..3}; do
-    write_color "$i" || RC=1 # Set RC=1 if any write fails
+if [[ "$1" == "--batch" ]]; then
+  PROCESSED=0
+  # "|| [[ -n ... ]]" also handles a last line without a trailing newline
+  while read -r zone_id color_hex || [[ -n "$zone_id" ]]; do
+    [[ -z "$zone_id" ]] && continue # Ignore blank lines
+    apply_zone "$zone_id" "$color_hex" || RC=1
+    PROCESSED=1
   done
-elif [[ "$ZONE_ID" =~ ^[0-3]$ ]]; then
-  write_color "$ZONE_ID" || RC=1
+  if [[ $PROCESSED -eq 0 ]]; then
+    echo "Error: --batch read no '<zone_id|all> <RRGGBB_HEX>' lines from stdin." >&2
+    RC=1
+  fi
 else
-  echo "Error: Invalid zone ID. Use 0, 1, 2, 3, or 'all'." >&2
-  RC=1
+  # --- Basic Validation ---
+  if [[ -z "$1" || -z "$2" ]]; then
+    echo "Usage: $0 <zone_id|all> <RRGGBB_HEX>" >&2
+    echo "       $0 --batch < lines of '<zone_id|all> <RRGGBB_HEX>'" >&2
+    exit 1
+  fi
+  apply_zone "$1" "$2" || RC=1
 fi
 
 exit $RC
@@ -1,44 +1,224 @@
 #!/usr/bin/env python
 
 import sys
-import subprocess
-import shlex
-import configparser
+import signal
 from pathlib import Path
 import os
-import re
+import logging
+from functools import lru_cache, partial
 
-from PyQt6.QtWidgets import (
-    QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
-    QLabel, QColorDialog, QFrame, QSizePolicy, QMessageBox, QGridLayout
-)
-from PyQt6.QtGui import QColor, QPalette, QFont
-from PyQt6.QtCore import Qt, QSize
+log = logging.getLogger('omen_rgb')
+log.addHandler(logging.NullHandler()) # Silent unless the entry point configures logging
 
 # --- Constants ---
 HELPER_SCRIPT_PATH = "/usr/local/bin/omen-rgb-helper.sh"
 CONFIG_DIR = Path.home() / ".config" / "omenrgbgui"
-CONFIG_FILE = CONFIG_DIR / "settings.ini"
+CONFIG_FILE = CONFIG_DIR / "settings.json"
+LEGACY_CONFIG_FILE = CONFIG_DIR / "settings.ini" # Read if settings.json does not exist yet
 SYSFS_RGB_BASE_PATH = Path("/sys/devices/platform/hp-wmi/rgb_zones")
+HELPER_TIMEOUT_MS = 20000
+ZONE_QUERY_DEBOUNCE_MS = 50
+APPLY_COALESCE_MS = 150
+NUMERIC_ZONE_IDS = ("0", "1", "2", "3")
+# Zone number formatted as two hex digits (e.g., 0 -> zone00_rgb, 1 -> zone01_rgb)
+_ZONE_PATHS = {zid: SYSFS_RGB_BASE_PATH / f"zone{int(zid):02X}_rgb" for zid in NUMERIC_ZONE_IDS}
+_HEX_DIGITS = frozenset(b'0123456789abcdefABCDEF')
+
+def _parse_zone_color(content: bytes) -> int | None:
+    """Returns the color in a zone's sysfs attribute as a packed 0xRRGGBB int, or None."""
+    # Kernel format is "RGB:rrggbb (R:... G:... B:...)"; a bare RRGGBB is accepted as well
+    _, sep, rest = content.partition(b'RGB:')
+    head = rest[:6] if sep else content.lstrip()[:6]
+    if len(head) == 6 and _HEX_DIGITS.issuperset(head):
+        return int(head, 16)
+    log.warning("Could not parse hex color from sysfs content: %r.", content)
+    return None
+
+def _write_zone_colors(updates) -> None:
+    """
+    Writes (numeric zone ID, RRGGBB) pairs straight to the sysfs files, skipping pkexec and
+    the helper. Raises OSError on the first failed write.
+    """
+    for zone_id_str, color_hex in updates:
+        # A bare fd and a single write(); no buffered wrapper for 6 bytes
+        fd = os.open(_ZONE_PATHS[zone_id_str], os.O_WRONLY)
+        try:
+            os.write(fd, color_hex.encode('ascii'))
+        finally:
+            os.close(fd)
+        log.info("Wrote %s directly to sysfs for zone '%s'.", color_hex, zone_id_str)
+
+def apply_headless(zone_id_str: str, color_hex: str) -> int:
+    """
+    Applies one color without starting the GUI and returns a process exit code.
+    Writes sysfs directly when the zone files are writable, otherwise runs the pkexec helper.
+    """
+    color_hex = color_hex.upper()
+    zone_ids = NUMERIC_ZONE_IDS if zone_id_str == "all" else (zone_id_str,)
+    if all(os.access(_ZONE_PATHS[zid], os.W_OK) for zid in zone_ids):
+        try:
+            _write_zone_colors((zid, color_hex) for zid in zone_ids)
+            return 0
+        except OSError as e:
+            log.warning("Direct sysfs write failed (%s). Falling back to pkexec helper.", e)
+
+    import subprocess
+    try:
+        # Binary stderr only: the helper prints nothing on success, so skip stdout and text decoding
+        proc = subprocess.Popen(["pkexec", HELPER_SCRIPT_PATH, zone_id_str, color_hex],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        log.error("'pkexec' command not found. Is Polkit (policykit-1) installed and in PATH?")
+        return 127
+    try:
+        _, stderr = proc.communicate(timeout=HELPER_TIMEOUT_MS / 1000)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        log.error("Command timed out. pkexec may be waiting for a password, or the helper script is stuck.")
+        return 124
+    if stderr:
+        log.log(logging.ERROR if proc.returncode else logging.WARNING,
+                "Helper script stderr:\n%s", stderr.decode(errors='replace').rstrip())
+    return proc.returncode
+
+def _parse_args(argv: list[str]):
+    """Parses our command-line options; unknown arguments are left for Qt."""
+    import argparse
+
+    def hex_color(value: str) -> str:
+        if len(value) != 6 or not _HEX_DIGITS.issuperset(value.encode('ascii', 'replace')):
+            raise argparse.ArgumentTypeError("use RRGGBB hex (e.g., FF0000)")
+        return value
+
+    parser = argparse.ArgumentParser(description="Control HP Omen 4-zone keyboard RGB lighting.")
+    parser.add_argument("--set", metavar="RRGGBB", type=hex_color,
+                        help="apply this color without opening the GUI")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="log informational messages to the console")
+    parser.add_argument("--zone", choices=(*NUMERIC_ZONE_IDS, "all"),
+                        help="zone for --set (default: all)")
+    args, qt_args = parser.parse_known_args(argv)
+    if args.zone is not None and args.set is None:
+        parser.error("--zone requires --set")
+    return args, qt_args
+
+# --- Headless fast path ---
+# Runs before the PyQt6 imports below, so CLI use never pays for loading Qt.
+if __name__ == '__main__':
+    _args, _qt_args = _parse_args(sys.argv[1:])
+    # OMEN_RGB_DEBUG additionally shows the exact helper invocation
+    logging.basicConfig(format="%(message)s",
+                        level=logging.DEBUG if os.environ.get('OMEN_RGB_DEBUG')
+                        else logging.INFO if _args.verbose else logging.WARNING)
+    if _args.set is not None:
+        sys.exit(apply_headless(_args.zone or "all", _args.set))
+
+import json
+
+from PyQt6.QtWidgets import (
+    QApplication, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
+    QLabel, QFrame, QSizePolicy, QMessageBox, QGridLayout, QButtonGroup
+)
+from PyQt6.QtGui import QColor, QPalette, QFont
+from PyQt6.QtCore import Qt, QSize, QProcess, QTimer, QRunnable, QThreadPool, QObject, pyqtSignal
+
+# Zone buttons as (label, zone ID, row, column, row span, column span) in the grid
+_ZONE_BUTTON_LAYOUT = (
+    ("Left",   "2",   1, 0, 1, 1), ("Middle", "1",   1, 1, 1, 1), ("Right",  "0",   1, 2, 1, 1),
+    ("WSAD",   "3",   2, 0, 1, 1), ("All Zones", "all", 2, 1, 1, 2)
+)
+# Built from integer RGB to skip Qt's color-name lookup ("lime" is pure green).
+# Shared instances: current_color is always replaced, never mutated in place.
+_WHITE = QColor(255, 255, 255) # Default/fallback color
+_QUICK_COLORS = (
+    ("Red", QColor(255, 0, 0)), ("Green", QColor(0, 255, 0)),
+    ("Blue", QColor(0, 0, 255)), ("White", _WHITE)
+)
+
+class _SettingsWriterSignals(QObject):
+    """Signals of _SettingsWriter; QRunnable is not a QObject, so it cannot emit them itself."""
+    saved = pyqtSignal(object) # (color name, zone) now on disk
+
+class _SettingsWriter(QRunnable):
+    """
+    Writes a rendered settings file atomically (temp file + os.replace) off the GUI thread.
+    Must run on a single-thread pool: that keeps writes to the shared temp file serialized
+    and in submission order, so an older save can never land after a newer one.
+    """
+
+    def __init__(self, settings: tuple[str, str], signals: _SettingsWriterSignals):
+        super().__init__()
+        self.settings = settings
+        self.data = json.dumps({'color': settings[0], 'zone': settings[1]}).encode('ascii')
+        self.signals = signals # Lives in the GUI thread, so its receivers get a queued call
+
+    def run(self):
+        tmp_path = CONFIG_FILE.with_suffix('.json.tmp')
+        try:
+            # One write() of the whole pre-rendered file instead of buffered per-line writes
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, self.data)
+                os.fsync(fd) # Data must be on disk before the rename, or a crash can leave an empty file
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, CONFIG_FILE)
+        except OSError as e:
+            log.error("Error writing config file %s: %s", CONFIG_FILE, e)
+            try:
+                os.unlink(tmp_path) # Don't leave a stray temp file behind
+            except OSError:
+                pass # os.open itself failed, so there is nothing to remove
+            return
+        try:
+            # The rename itself is only durable once the directory entry is flushed too
+            dir_fd = os.open(CONFIG_DIR, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError as e:
+            # The new file is already in place; it just might not survive a crash yet
+            log.warning("Could not flush config directory %s: %s", CONFIG_DIR, e)
+        log.info("Settings saved to %s", CONFIG_FILE)
+        self.signals.saved.emit(self.settings)
 
 class OmenRgbGui(QWidget):
+    _config_dir_ok = False # Set once CONFIG_DIR is known to exist
+    _ZONE_DISPLAY = {**{zid: f"Zone {zid}" for zid in NUMERIC_ZONE_IDS}, "all": "All"}
+
     def __init__(self):
         super().__init__()
-        self.current_color = QColor("white") # Default/fallback color
+        self.current_color = _WHITE          # Default/fallback color
+        self._color_name = "#ffffff"         # current_color as #rrggbb, kept in sync with it
+        self._color_hex_upper = "FFFFFF"     # current_color as RRGGBB, kept in sync with it
         self.target_zone = "all"             # Default target zone
-
+        self._proc = None                    # Running pkexec helper, if any
+        self._helper_timed_out = False
+        self._helper_stderr = bytearray()    # stderr collected from the running helper
+        self._closing = False                # Window closed while a helper was running
+        self._pending_apply = None           # (description, settings) of the updates the helper is applying
+        self._pending_updates = {}           # Numeric zone ID -> RRGGBB queued by Apply, not yet written
+        self._queued_settings = None         # (color name, zone) of the last Apply click, saved once written
+        self._last_saved = None              # (color name, zone) last loaded from/saved to disk
+        self._zone_fds = {}                  # Zone ID -> read-only fd of its sysfs file
+        self._last_preview_rgb = None        # Color currently shown by the preview frame
+        # One worker thread, so settings writes finish in the order they were queued
+        self._settings_pool = QThreadPool(self)
+        self._settings_pool.setMaxThreadCount(1)
+        self._settings_signals = _SettingsWriterSignals(self)
+        self._settings_signals.saved.connect(self._on_settings_saved)
+
+        # If every zone file is writable by us, apply_settings can skip pkexec entirely
+        self._direct_write_ok = all(os.access(p, os.W_OK) for p in _ZONE_PATHS.values())
         self.load_settings()
         self.init_ui()
         self.update_ui_from_loaded_settings()
 
     def _get_sysfs_path_for_zone(self, zone_id_str: str) -> Path | None:
-        """Helper to construct the sysfs path for a given zone ID string."""
-        if not zone_id_str.isdigit():
-            return None
-        zone_num = int(zone_id_str)
-        # Format zone number as two hex digits (e.g., 0 -> 00, 1 -> 01)
-        zone_hex_str = f"{zone_num:02X}"
-        return SYSFS_RGB_BASE_PATH / f"zone{zone_hex_str}_rgb"
+        """Helper to look up the sysfs path for a given zone ID string."""
+        return _ZONE_PATHS.get(zone_id_str)
 
     def _query_color_from_sysfs_for_zone(self, zone_id_str: str) -> QColor | None:
         """
@@ -47,96 +227,152 @@ class OmenRgbGui(QWidget):
         """
         sysfs_file_path = self._get_sysfs_path_for_zone(zone_id_str)
         if not sysfs_file_path:
-            print(f"Cannot determine sysfs path for zone ID '{zone_id_str}'.")
+            log.warning("Cannot determine sysfs path for zone ID '%s'.", zone_id_str)
             return None
 
         try:
-            with open(sysfs_file_path, 'r') as f:
-                content = f.read().strip()
-                match = re.search(r'([0-9a-fA-F]{6})', content)
-                if match:
-                    hex_color = match.group(1)
-                    parsed_qcolor = QColor(f"#{hex_color}")
-                    if parsed_qcolor.isValid():
-                        print(f"Successfully queried color for zone {zone_id_str} from {sysfs_file_path}: {parsed_qcolor.name()}")
-                        return parsed_qcolor
-                    else:
-                        print(f"Sysfs for zone {zone_id_str} gave invalid hex '#{hex_color}' from content '{content}'.")
-                else:
-                    print(f"Could not parse hex color from sysfs content for zone {zone_id_str}: '{content}'.")
+            fd = self._zone_fds.get(zone_id_str)
+            if fd is None:
+                # Opened once and kept; errors here map to the except branches below
+                fd = os.open(sysfs_file_path, os.O_RDONLY)
+                self._zone_fds[zone_id_str] = fd
+            # sysfs regenerates the attribute on every read at offset 0, so the fd can be reused.
+            # Always re-read: kernfs does not bump mtime on writes, so colors set through
+            # --set, the helper or another program would not show up in a cached value.
+            rgb = _parse_zone_color(os.pread(fd, 64, 0)) # The attribute is a single short line
+            if rgb is not None:
+                # Built straight from the packed value (opaque alpha), no string parsing
+                parsed_qcolor = QColor.fromRgb(0xFF000000 | rgb)
+                log.info("Successfully queried color for zone %s from %s: %s", zone_id_str, sysfs_file_path, parsed_qcolor.name())
+                return parsed_qcolor
         except FileNotFoundError:
-            print(f"Sysfs file for zone {zone_id_str} not found: {sysfs_file_path}.")
+            log.warning("Sysfs file for zone %s not found: %s.", zone_id_str, sysfs_file_path)
         except PermissionError:
-            print(f"Permission denied reading sysfs file for zone {zone_id_str}: {sysfs_file_path}. "
-                  "GUI needs read access or helper script modification for this feature.")
+            log.warning("Permission denied reading sysfs file for zone %s: %s. "
+                        "GUI needs read access or helper script modification for this feature.", zone_id_str, sysfs_file_path)
         except Exception as e:
-            print(f"Error reading color for zone {zone_id_str} from sysfs ({sysfs_file_path}): {e}")
+            log.warning("Error reading color for zone %s from sysfs (%s): %s", zone_id_str, sysfs_file_path, e)
         return None
 
+    def closeEvent(self, event):
+        """Writes any still-queued updates and settings, and closes the cached sysfs fds when the window goes away."""
+        if self._apply_debounce.isActive():
+            self._apply_debounce.stop()
+            self._flush_pending_updates()
+        if self._proc is not None:
+            # Don't kill a helper mid-write or block the event loop waiting for it (Polkit may
+            # still be prompting): just hide, and let _finish_helper close us once it is done.
+            self._closing = True
+            self.hide()
+            event.ignore()
+            return
+        self._settings_pool.waitForDone() # Let a queued settings save reach the disk
+        for fd in self._zone_fds.values():
+            os.close(fd)
+        self._zone_fds.clear()
+        super().closeEvent(event)
+
     def ensure_config_dir_exists(self):
-        # ... (no changes)
+        if OmenRgbGui._config_dir_ok:
+            return # Already created/verified; skip the mkdir syscall
         try:
             CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+            OmenRgbGui._config_dir_ok = True
         except OSError as e:
-            print(f"Error creating config directory {CONFIG_DIR}: {e}")
+            log.error("Error creating config directory %s: %s", CONFIG_DIR, e)
 
     def load_settings(self):
-        # ... (no changes to logic, but uses the new _query_color_from_sysfs_for_zone)
-        self.ensure_config_dir_exists()
-        config = configparser.ConfigParser()
         loaded_color_from_config = False
+        migrate_legacy_file = False
 
-        if CONFIG_FILE.exists():
-            try:
-                config.read(CONFIG_FILE)
-                if 'Settings' in config:
-                    settings = config['Settings']
-                    color_hex_from_config = settings.get('last_color_hex')
-                    if color_hex_from_config:
-                        temp_color = QColor(color_hex_from_config)
-                        if temp_color.isValid():
-                            self.current_color = temp_color
-                            loaded_color_from_config = True
-                            print(f"Loaded color from config: {self.current_color.name()}")
-                        else:
-                            print(f"Invalid color '{color_hex_from_config}' in config. Using default.")
-                    
-                    self.target_zone = settings.get('last_target_zone', self.target_zone)
-                    if loaded_color_from_config or 'last_target_zone' in settings:
-                         print(f"Loaded settings: Zone '{self.target_zone}'")
-            except Exception as e:
-                print(f"Error processing config settings: {e}. Using defaults.")
-                self.current_color = QColor("white")
-                loaded_color_from_config = False
+        try:
+            settings, from_current_file = self._read_settings_file()
+            if settings:
+                color_hex_from_config = settings.get('color')
+                if color_hex_from_config:
+                    temp_color = QColor(color_hex_from_config)
+                    if temp_color.isValid():
+                        self.current_color = temp_color
+                        loaded_color_from_config = True
+                        log.info("Loaded color from config: %s", self.current_color.name())
+                    else:
+                        log.warning("Invalid color '%s' in config. Using default.", color_hex_from_config)
+                
+                self.target_zone = settings.get('zone', self.target_zone)
+                if loaded_color_from_config or 'zone' in settings:
+                     log.info("Loaded settings: Zone '%s'", self.target_zone)
+                if loaded_color_from_config and from_current_file:
+                    # What is on disk now; lets save_settings skip identical rewrites
+                    self._last_saved = (self.current_color.name(), self.target_zone)
+                elif loaded_color_from_config:
+                    migrate_legacy_file = True
+        except FileNotFoundError:
+            pass # First run; reading directly saves a separate exists() stat
+        except (OSError, ValueError) as e: # Unreadable file, bad JSON/encoding; QColor never raises
+            log.warning("Error processing config settings: %s. Using defaults.", e)
+            self.current_color = _WHITE
+            loaded_color_from_config = False
 
         if not loaded_color_from_config:
-            print("No valid color in config. Attempting to query sysfs for zone 0 as initial color.")
+            log.info("No valid color in config. Using the color queried from sysfs for zone 0 as initial color.")
             # Try to get an initial color from zone 0 (Right) if nothing was loaded
             initial_queried_color = self._query_color_from_sysfs_for_zone("0")
             if initial_queried_color:
                 self.current_color = initial_queried_color
             else:
-                self.current_color = QColor("white") # Fallback to white
-                print("Failed to query initial color from zone 0, defaulting to white.")
+                self.current_color = _WHITE # Fallback to white
+                log.info("Failed to query initial color from zone 0, defaulting to white.")
+        self._update_color_strings()
 
+        if migrate_legacy_file:
+            # Migrate right away so later startups skip the legacy INI parse
+            log.info("Migrating %s to %s", LEGACY_CONFIG_FILE, CONFIG_FILE)
+            self.save_settings()
 
-    def save_settings(self):
-        # ... (no changes)
-        self.ensure_config_dir_exists()
-        config = configparser.ConfigParser()
-        config['Settings'] = {
-            'last_color_hex': self.current_color.name(),
-            'last_target_zone': self.target_zone
-        }
+    def _update_color_strings(self):
+        """Caches the string forms of current_color used by status, apply and save."""
+        rgb = self.current_color.rgb() & 0xFFFFFF
+        self._color_name = f"#{rgb:06x}"     # Same as QColor.name()
+        self._color_hex_upper = f"{rgb:06X}"
+
+    def _read_settings_file(self) -> tuple[dict, bool]:
+        """
+        Returns the saved settings as {'color': ..., 'zone': ...} (string values only) and whether
+        they came from settings.json. Falls back to the settings.ini written by older versions;
+        raises FileNotFoundError if neither file exists and ValueError if the JSON is malformed.
+        """
         try:
-            with open(CONFIG_FILE, 'w') as configfile:
-                config.write(configfile)
-            print(f"Settings saved to {CONFIG_FILE}")
-        except OSError as e:
-            print(f"Error writing config file {CONFIG_FILE}: {e}")
+            data = json.loads(CONFIG_FILE.read_bytes())
+        except FileNotFoundError:
+            pass
+        else:
+            if not isinstance(data, dict):
+                raise ValueError(f"{CONFIG_FILE} does not contain a JSON object")
+            return {key: value for key, value in data.items() if isinstance(value, str)}, True
+        # Legacy format: two "key = value" lines under [Settings]
+        legacy = {}
+        for line in LEGACY_CONFIG_FILE.read_text(encoding='ascii').splitlines():
+            key, sep, value = line.partition('=')
+            if sep: # Skips the section header and blank lines
+                legacy[key.strip()] = value.strip()
+        key_map = (('last_color_hex', 'color'), ('last_target_zone', 'zone'))
+        return {new: legacy[old] for old, new in key_map if old in legacy}, False
+
+    def save_settings(self, current: tuple[str, str] | None = None):
+        """Saves (color name, zone) in the background; defaults to the current selection."""
+        if current is None:
+            current = (self._color_name, self.target_zone)
+        if current == self._last_saved:
+            return # Nothing changed since the last load/save
+        self.ensure_config_dir_exists()
+        # The file write itself happens on a worker thread so Apply never waits on $HOME
+        self._settings_pool.start(_SettingsWriter(current, self._settings_signals))
+
+    def _on_settings_saved(self, settings: tuple[str, str]):
+        """Records a completed write; after a failed one the same settings are retried next time."""
+        self._last_saved = settings
             
     def init_ui(self):
-        # ... (no changes to button layout from previous version) ...
         self.setWindowTitle('Omen RGB Control')
         main_layout = QVBoxLayout(self)
 
@@ -145,29 +381,27 @@ class OmenRgbGui(QWidget):
         zone_group_layout.addWidget(zone_label, 0, 0, 1, 3)
 
         self.zone_buttons = {}
-        button_definitions = [
-            ("Left",   "2",   1, 0, 1, 1), ("Middle", "1",   1, 1, 1, 1), ("Right",  "0",   1, 2, 1, 1),
-            ("WSAD",   "3",   2, 0, 1, 1), ("All Zones", "all", 2, 1, 1, 2)
-        ]
-        for display_text, zone_id, r, c, rs, cs in button_definitions:
+        # Exclusive group: Qt unchecks the previously selected zone button by itself
+        self._zone_group = QButtonGroup(self)
+        self._zone_group.setExclusive(True)
+        self._zone_ids_by_button_id = []
+        for display_text, zone_id, r, c, rs, cs in _ZONE_BUTTON_LAYOUT:
             button = QPushButton(display_text)
             button.setCheckable(True)
-            button.clicked.connect(lambda checked, current_zid=zone_id: self.select_zone(current_zid))
+            self._zone_group.addButton(button, len(self._zone_ids_by_button_id))
+            self._zone_ids_by_button_id.append(zone_id)
             self.zone_buttons[zone_id] = button
             zone_group_layout.addWidget(button, r, c, rs, cs)
+        self._zone_group.idClicked.connect(self._on_zone_id_clicked)
         main_layout.addLayout(zone_group_layout)
         main_layout.addSpacing(15)
 
         predefined_colors_layout = QHBoxLayout()
         predefined_colors_label = QLabel("Quick Colors:")
         predefined_colors_layout.addWidget(predefined_colors_label)
-        colors = {
-            "Red": QColor("red"), "Green": QColor("lime"),
-            "Blue": QColor("blue"), "White": QColor("white")
-        }
-        for name, color_val in colors.items():
+        for name, color_val in _QUICK_COLORS:
             btn = QPushButton(name)
-            btn.clicked.connect(lambda checked, cv=color_val: self.set_current_color(cv))
+            btn.clicked.connect(partial(self._on_quick_color_clicked, color_val))
             predefined_colors_layout.addWidget(btn)
         predefined_colors_layout.addStretch(1)
         main_layout.addLayout(predefined_colors_layout)
@@ -181,16 +415,33 @@ class OmenRgbGui(QWidget):
         self.color_preview.setFrameShape(QFrame.Shape.StyledPanel)
         self.color_preview.setMinimumSize(QSize(60, 30))
         self.color_preview.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Fixed)
+        self.color_preview.setAutoFillBackground(True)
+        self._preview_palette = QPalette(self.color_preview.palette()) # Reused by _refresh_ui
         custom_color_layout.addWidget(self.color_preview)
         custom_color_layout.addStretch(1)
         main_layout.addLayout(custom_color_layout)
         main_layout.addSpacing(15)
 
-        apply_btn = QPushButton("Apply Settings")
-        apply_btn.setFont(QFont(apply_btn.font().family(), 12, QFont.Weight.Bold))
-        apply_btn.setMinimumHeight(40)
-        apply_btn.clicked.connect(self.apply_settings)
-        main_layout.addWidget(apply_btn, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.apply_btn = QPushButton("Apply Settings")
+        self.apply_btn.setFont(QFont(self.apply_btn.font().family(), 12, QFont.Weight.Bold))
+        self.apply_btn.setMinimumHeight(40)
+        self.apply_btn.clicked.connect(self.apply_settings)
+        main_layout.addWidget(self.apply_btn, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        self._zone_debounce = QTimer(self)
+        self._zone_debounce.setSingleShot(True)
+        self._zone_debounce.setInterval(ZONE_QUERY_DEBOUNCE_MS)
+        self._zone_debounce.timeout.connect(self._refresh_zone_color)
+
+        self._apply_debounce = QTimer(self)
+        self._apply_debounce.setSingleShot(True)
+        self._apply_debounce.setInterval(APPLY_COALESCE_MS)
+        self._apply_debounce.timeout.connect(self._flush_pending_updates)
+
+        self._helper_timer = QTimer(self)
+        self._helper_timer.setSingleShot(True)
+        self._helper_timer.setInterval(HELPER_TIMEOUT_MS)
+        self._helper_timer.timeout.connect(self._on_helper_timeout)
 
         self.status_label = QLabel("Ready. Select zone and color.")
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -201,7 +452,6 @@ class OmenRgbGui(QWidget):
 
 
     def update_ui_from_loaded_settings(self):
-        # ... (no changes)
         if self.target_zone in self.zone_buttons:
             self.zone_buttons[self.target_zone].setChecked(True)
         else:
@@ -210,27 +460,38 @@ class OmenRgbGui(QWidget):
                  self.zone_buttons[default_zone_id].setChecked(True)
                  self.target_zone = default_zone_id
             else:
-                 print("Error: Default 'all' zone button not found during UI update.")
-        self.update_color_preview()
-        self.update_status_label()
+                 log.error("Default 'all' zone button not found during UI update.")
+        self._refresh_ui(refresh_preview=True)
 
     def set_current_color(self, color: QColor):
-        # ... (no changes)
         if color.isValid():
+            if color.rgb() == self.current_color.rgb():
+                return # Same color (e.g. a repeated quick-color click); nothing to redraw
             self.current_color = color
-            self.update_color_preview()
-            self.update_status_label()
+            self._update_color_strings() # Computed once, reused by status/apply/save
+            self._refresh_ui(refresh_preview=True)
         else:
-            print(f"Attempted to set an invalid color: {color}")
+            log.warning("Attempted to set an invalid color: %s", color)
+
+    def _on_zone_id_clicked(self, button_id: int):
+        self.select_zone(self._zone_ids_by_button_id[button_id])
+
+    def _on_quick_color_clicked(self, color: QColor, _checked: bool = False):
+        self.set_current_color(color)
 
     def select_zone(self, zone_id: str):
-        """Sets the target zone, updates button states, and attempts to query actual zone color."""
+        """Sets the target zone and schedules a query of its actual color (button states come from the exclusive group)."""
         self.target_zone = zone_id
-        for zid, button in self.zone_buttons.items():
-            button.setChecked(zid == zone_id)
         
-        print(f"Target zone set to: '{self.target_zone}'")
+        log.info("Target zone set to: '%s'", self.target_zone)
 
+        # Coalesce rapid zone clicks: only the last selection within the interval hits sysfs
+        self._zone_debounce.start()
+        
+        self._refresh_ui(refresh_preview=False) # Color unchanged; only the label needs redrawing
+
+    def _refresh_zone_color(self):
+        """Attempts to query the actual color of self.target_zone from sysfs."""
         if self.target_zone != "all":
             queried_zone_color = self._query_color_from_sysfs_for_zone(self.target_zone)
             if queried_zone_color:
@@ -239,90 +500,214 @@ class OmenRgbGui(QWidget):
             else:
                 # If query fails, current_color remains as the last globally selected one.
                 # The preview will show the color that *will be applied* if the user clicks "Apply".
-                print(f"Could not query current color for zone '{self.target_zone}'. "
-                      "Color preview shows last selected/default color to be applied.")
+                log.info("Could not query current color for zone '%s'. "
+                         "Color preview shows last selected/default color to be applied.", self.target_zone)
         # For "all" zone, self.current_color remains as the globally selected color to be applied.
-        
-        self.update_status_label() # Update status label after potential color change
 
 
-    def update_color_preview(self):
-        # ... (no changes)
-        palette = self.color_preview.palette()
-        palette.setColor(QPalette.ColorRole.Window, self.current_color)
-        self.color_preview.setPalette(palette)
-        self.color_preview.setAutoFillBackground(True)
-
     def show_color_dialog(self):
-        # ... (no changes)
-        initial_color_for_dialog = self.current_color if self.current_color.isValid() else QColor("white")
+        from PyQt6.QtWidgets import QColorDialog # Only needed once the picker is actually opened
+        initial_color_for_dialog = self.current_color if self.current_color.isValid() else _WHITE
         color = QColorDialog.getColor(initial_color_for_dialog, self, "Choose Custom Color")
         if color.isValid():
             self.set_current_color(color)
 
-    def update_status_label(self):
-        # ... (no changes)
-        color_name = self.current_color.name().upper() if self.current_color.isValid() else "INVALID"
-        zone_display_name = self.target_zone.capitalize() if self.target_zone != "all" else "All"
-        if self.target_zone.isdigit():
-            zone_display_name = f"Zone {self.target_zone}"
-        self.status_label.setText(f"Target: {zone_display_name}, Color: {color_name}")
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _format_status(zone: str, color_hex: str | None) -> str:
+        """Renders the status label text; cached since users toggle between a few zone/color pairs."""
+        color_name = f"#{color_hex}" if color_hex else "INVALID"
+        zone_display_name = OmenRgbGui._ZONE_DISPLAY.get(zone, zone)
+        return f"Target: {zone_display_name}, Color: {color_name}"
+
+    def _refresh_ui(self, refresh_preview: bool):
+        """Redraws the status label and, if requested, the color preview for the current color/zone."""
+        color = self.current_color
+        if refresh_preview:
+            rgb = color.rgb()
+            if rgb != self._last_preview_rgb: # Skip the palette/repaint churn if already shown
+                self._last_preview_rgb = rgb
+                self._preview_palette.setColor(QPalette.ColorRole.Window, color)
+                self.color_preview.setPalette(self._preview_palette)
+        color_hex = self._color_hex_upper if color.isValid() else None
+        self.status_label.setText(self._format_status(self.target_zone, color_hex))
 
     def apply_settings(self):
-        # ... (no changes)
+        if self._zone_debounce.isActive():
+            # A zone was just selected; pick up its color before deciding what to apply
+            self._zone_debounce.stop()
+            self._refresh_zone_color()
+
         if not self.current_color.isValid():
             QMessageBox.warning(self, "Invalid Color", 
                                 "Cannot apply an invalid color. Please choose a valid color first.")
             self.status_label.setText("Error: Invalid color selected.")
             return
 
-        color_hex = self.current_color.name()[1:].upper()
+        color_hex = self._color_hex_upper
         zone_id_str = str(self.target_zone)
 
+        # Queue the update and flush after a short delay, so several Apply clicks in quick
+        # succession (e.g. one per zone) go out as a single helper call / authorization.
+        # "all" is expanded per zone, so a later single-zone Apply simply overrides its entry.
+        for zid in (NUMERIC_ZONE_IDS if zone_id_str == "all" else (zone_id_str,)):
+            self._pending_updates[zid] = color_hex
+        self._queued_settings = (self._color_name, zone_id_str)
         self.status_label.setText(f"Applying {color_hex} to zone '{zone_id_str}'...")
-        QApplication.processEvents()
-
-        command = [ "pkexec", HELPER_SCRIPT_PATH, zone_id_str, color_hex ]
-        print(f"Executing: {' '.join(shlex.quote(arg) for arg in command)}")
+        self._apply_debounce.start()
+
+    def _flush_pending_updates(self):
+        """Writes all queued (zone, color) updates, directly or through one pkexec helper call."""
+        if not self._pending_updates:
+            return # Apply is disabled while a helper runs, so nothing can be queued behind it
+        updates = list(self._pending_updates.items())
+        self._pending_updates.clear()
+        summary = self._describe_updates(updates)
+        # What was applied, not the live selection, which may change while Polkit prompts
+        applied = self._queued_settings
+
+        if self._direct_write_ok and self._write_zones_directly(updates):
+            self.save_settings(applied)
+            self.status_label.setText(f"Successfully applied {summary}. Settings saved.")
+            return
 
+        colors = {color_hex for _, color_hex in updates}
+        if len(updates) == 1 or (len(updates) == len(NUMERIC_ZONE_IDS) and len(colors) == 1):
+            # One zone or one color everywhere: the positional "<zone|all> <hex>" form, which also
+            # works with helper scripts installed before --batch existed
+            zone_id_str = updates[0][0] if len(updates) == 1 else "all"
+            arguments = [HELPER_SCRIPT_PATH, zone_id_str, colors.pop()]
+            batch = ""
+        else:
+            # Mixed per-zone updates: one "<zone> <hex>" line each on stdin, so they still need
+            # only a single pkexec authorization
+            arguments = [HELPER_SCRIPT_PATH, "--batch"]
+            batch = "".join(f"{zone_id_str} {color_hex}\n" for zone_id_str, color_hex in updates)
+        if log.isEnabledFor(logging.DEBUG):
+            import shlex # Only needed for this diagnostic
+            command = shlex.join(["pkexec", *arguments])
+            if batch:
+                command += f" <<< {shlex.quote(batch.strip())}"
+            log.debug("Executing: %s", command)
+
+        # Run pkexec asynchronously so the event loop keeps running while Polkit prompts.
+        self.apply_btn.setEnabled(False)
+        self._helper_timed_out = False
+        self._pending_apply = (summary, applied)
+        self._proc = QProcess(self)
+        self._proc.setProgram("pkexec")
+        self._proc.setArguments(arguments)
+        self._proc.finished.connect(self._on_helper_finished)
+        self._proc.errorOccurred.connect(self._on_helper_error)
+        self._proc.readyReadStandardError.connect(self._on_helper_stderr)
+        self._helper_stderr = bytearray()
+        self._helper_timer.start()
+        self._proc.start()
+        if batch:
+            self._proc.write(batch.encode('ascii'))
+        self._proc.closeWriteChannel() # EOF ends the helper's read loop
+
+    @staticmethod
+    def _describe_updates(updates: list[tuple[str, str]]) -> str:
+        """Summarizes (zone, color) updates for the status label, folding a uniform all-zone write."""
+        colors = {color_hex for _, color_hex in updates}
+        if len(updates) == len(NUMERIC_ZONE_IDS) and len(colors) == 1:
+            return f"{colors.pop()} to zone 'all'"
+        return ", ".join(f"{color_hex} to zone '{zone_id_str}'" for zone_id_str, color_hex in updates)
+
+    def _write_zones_directly(self, updates: list[tuple[str, str]]) -> bool:
+        """
+        Writes per-zone (zone, color) updates with _write_zone_colors. Only used when the files are
+        writable by the current user (e.g. via a udev rule).
+        Returns False if any write fails, so the caller can fall back to the helper.
+        """
         try:
-            result = subprocess.run(command, check=True, capture_output=True, text=True, timeout=20)
-            self.save_settings()
-            success_msg = f"Successfully applied {color_hex} to zone '{zone_id_str}'. Settings saved."
-            if result.stdout: print(f"Helper script stdout:\n{result.stdout}")
-            if result.stderr:
-                print(f"Helper script stderr (warnings?):\n{result.stderr}")
+            _write_zone_colors(updates)
+        except OSError as e:
+            log.warning("Direct sysfs write failed (%s). Falling back to pkexec helper.", e)
+            return False
+        return True
+
+    def _on_helper_timeout(self):
+        """Kills a helper that did not finish in time; _on_helper_finished reports it."""
+        if self._proc is not None and self._proc.state() != QProcess.ProcessState.NotRunning:
+            self._helper_timed_out = True
+            self._proc.kill()
+
+    def _on_helper_stderr(self):
+        """Echoes helper stderr as it arrives and keeps it for the final report."""
+        chunk = bytes(self._proc.readAllStandardError())
+        if not chunk:
+            return
+        self._helper_stderr += chunk
+        log.warning("Helper script stderr: %s", chunk.decode(errors='replace').rstrip())
+
+    def _on_helper_error(self, error: QProcess.ProcessError):
+        """Handles errors for which QProcess never emits finished (pkexec could not be started)."""
+        if error != QProcess.ProcessError.FailedToStart:
+            return # Crashes (including our own kill on timeout) are reported by _on_helper_finished
+        error_msg = "Error: 'pkexec' command not found. Is Polkit (policykit-1) installed and in PATH?"
+        self.status_label.setText("Critical Error: pkexec missing.")
+        QMessageBox.critical(self, "Startup Error", error_msg)
+        log.error(error_msg)
+        self._finish_helper()
+
+    def _on_helper_finished(self, exit_code: int, exit_status: QProcess.ExitStatus):
+        """Reports the result of the pkexec helper call started by apply_settings."""
+        self._helper_timer.stop()
+        stdout = bytes(self._proc.readAllStandardOutput()).decode(errors="replace")
+        self._on_helper_stderr() # Log and keep anything not streamed yet
+        stderr = self._helper_stderr.decode(errors="replace")
+        summary, applied = self._pending_apply
+
+        if self._helper_timed_out:
+            error_msg = ("Error: Command timed out. \nThis might happen if pkexec is waiting for a password "
+                         "and none is provided, or if the helper script is stuck.")
+            self.status_label.setText("Timeout Error. Check console for details.")
+            QMessageBox.warning(self, "Timeout Error", error_msg)
+            log.error(error_msg)
+        elif exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0:
+            self.save_settings(applied)
+            success_msg = f"Successfully applied {summary}. Settings saved."
+            if stdout: log.info("Helper script stdout:\n%s", stdout)
+            if stderr: # Already logged by _on_helper_stderr as it arrived
                 success_msg += " (Helper warnings in console)"
             self.status_label.setText(success_msg)
-        except subprocess.CalledProcessError as e:
-            error_msg_detail = e.stderr.strip() if e.stderr else e.stdout.strip()
+        else:
+            error_msg_detail = stderr.strip() if stderr else stdout.strip()
             if not error_msg_detail: error_msg_detail = "Unknown error from helper script or pkexec."
             error_title = "Apply Error"
-            full_error_msg = f"Error applying settings (code {e.returncode}).\n"
-            if e.returncode == 127:
+            full_error_msg = f"Error applying settings (code {exit_code}).\n"
+            if exit_code == 127:
                  full_error_msg += "pkexec: Authorization failed, policy issue, or helper script not found/executable."
-            elif e.returncode == 126:
+            elif exit_code == 126:
                  full_error_msg += "pkexec: Authorization cancelled by user."
             else:
                  full_error_msg += f"Helper/pkexec reported: {error_msg_detail}"
             self.status_label.setText("Error applying settings. Check console for details.")
             QMessageBox.warning(self, error_title, full_error_msg)
-            print(f"Error during pkexec call. Return code: {e.returncode}\n"
-                  f"Stdout from script: {e.stdout}\nStderr from script: {e.stderr}")
-        except FileNotFoundError:
-             error_msg = "Error: 'pkexec' command not found. Is Polkit (policykit-1) installed and in PATH?"
-             self.status_label.setText("Critical Error: pkexec missing.")
-             QMessageBox.critical(self, "Startup Error", error_msg)
-             print(error_msg)
-        except subprocess.TimeoutExpired:
-             error_msg = ("Error: Command timed out. \nThis might happen if pkexec is waiting for a password "
-                          "and none is provided, or if the helper script is stuck.")
-             self.status_label.setText("Timeout Error. Check console for details.")
-             QMessageBox.warning(self, "Timeout Error", error_msg)
-             print(error_msg)
+            # Stderr was already logged by _on_helper_stderr as it arrived
+            log.error("Error during pkexec call. Return code: %s\n"
+                      "Stdout from script: %s", exit_code, stdout)
+        self._finish_helper()
+
+    def _finish_helper(self):
+        """Releases the finished helper process and re-enables the Apply button."""
+        self._helper_timer.stop()
+        if self._proc is not None:
+            self._proc.deleteLater()
+            self._proc = None
+        self.apply_btn.setEnabled(True)
+        if self._closing:
+            # Deferred from closeEvent; the window is already hidden, so quit explicitly
+            self.close()
+            QApplication.quit()
 
 # --- Main execution ---
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
+    # Python-level SIGINT handlers never run while Qt's C++ event loop is blocked waiting
+    # for events, so restore the default action to let Ctrl+C in the terminal quit the GUI.
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    app = QApplication([sys.argv[0], *_qt_args])
     ex = OmenRgbGui()
     sys.exit(app.exec())
\ No newline at end of file